@@ -1,25 +1,56 @@
 # app.py
+import hashlib
+import io
+import os
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from pathlib import Path
+
 import streamlit as st
 import pandas as pd
+import pyarrow as pa
 import numpy as np
+import bottleneck as bn
 import plotly.express as px
-from wordcloud import WordCloud
-import matplotlib.pyplot as plt
+import plotly.graph_objects as go
 from pytrends.request import TrendReq
 
-# ---------------------------
-# 1. Page Config
-# ---------------------------
-st.set_page_config(
-    page_title="Search Before Action: Delivery Wars",
-    page_icon="🍔",
-    layout="wide"
-)
+_RNG = np.random.default_rng(0)
+_APP_COLORS = {"Swiggy": "orange", "Zomato": "red", "Blinkit": "green"}
+_CACHE_DIR = Path(__file__).resolve().parent / ".cache"
 
-# ---------------------------
-# 2. CSS Animations & Styling
-# ---------------------------
-st.markdown("""
+# Stats page formulas, sent as one markdown element instead of three st.latex calls.
+_FORMULAS_MD = r"""
+$$
+Z = \frac{x - \mu}{\sigma}
+$$
+
+$$
+\text{Correlation}(X,Y) = \frac{\text{cov}(X,Y)}{\sigma_X \sigma_Y}
+$$
+
+$$
+\text{Lag Correlation} = \text{Corr}(X_t, Y_{t+k})
+$$
+"""
+
+# Google Trends region names -> the names used across the dashboard.
+_STATE_MAPPING = {
+    "NCT": "Delhi",
+    "Orissa": "Odisha",
+    "Uttaranchal": "Uttarakhand",
+    "Jammu & Kashmir": "Jammu and Kashmir",
+    "Andaman & Nicobar Islands": "Andaman & Nicobar",
+    "Dadra and Nagar Haveli": "Dadra & Nagar Haveli",
+    "Daman and Diu": "Daman & Diu",
+    "Arunanchal Pradesh": "Arunachal Pradesh"
+}
+
+# Static page chrome. Emitted on every full run: Streamlit drops any element a
+# rerun does not re-emit, so a "send once" guard would wipe the styling.
+_CSS = """
 <style>
 /* Sidebar buttons animation */
 .css-1lcbmhc.e1fqkh3o2 > div[data-baseweb="radio"] > label {
@@ -59,7 +90,79 @@ h2, h3 {
     60% {transform: translateY(-2px);}
 }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+_FOOTER_HTML = """
+<style>
+.footer-card {
+    background-color: #F8F9FA;
+    padding: 20px;
+    border-radius: 12px;
+    margin-top: 30px;
+    text-align: center;
+    border: 1px solid #E0E0E0;
+    font-family: 'Arial', sans-serif;
+    transition: transform 0.3s ease, box-shadow 0.3s ease;
+}
+.footer-card:hover {
+    transform: scale(1.05);
+    box-shadow: 0 8px 20px rgba(0,0,0,0.15);
+}
+.footer-table {
+    margin: auto;
+    color: #34495E;
+    font-size: 14px;
+    border-collapse: collapse;
+}
+.footer-table th, .footer-table td {
+    padding: 5px 15px;
+    border-bottom: 1px solid #BDC3C7;
+}
+.footer-title {
+    margin: 5px;
+    color: #2E86C1;
+    font-weight: bold;
+}
+.footer-team {
+    color: #D35400;
+}
+.footer-copy {
+    margin-top: 10px;
+    font-size: 12px;
+    color: #7F8C8D;
+}
+</style>
+
+<div class="footer-card">
+    <h3 class="footer-title">Developed by: <span class="footer-team">STANDARD DEVIANTS</span></h3>
+    <table class="footer-table">
+        <tr>
+            <th>Team Member</th>
+            <th>Roll Number</th>
+        </tr>
+        <tr><td>NIRANJAN PRAMOD</td><td>252BDA09</td></tr>
+        <tr><td>MENDONCA TANISHA DENIS</td><td>252BDA10</td></tr>
+        <tr><td>TANISHQ SULTANIA</td><td>252BDA12</td></tr>
+        <tr><td>R VINAY KUMAR</td><td>252BDA14</td></tr>
+        <tr><td>RAKSHITH C</td><td>252BDA31</td></tr>
+    </table>
+    <p class="footer-copy">&copy; 2025 Search Before Action: Delivery Wars</p>
+</div>
+"""
+
+# ---------------------------
+# 1. Page Config
+# ---------------------------
+st.set_page_config(
+    page_title="Search Before Action: Delivery Wars",
+    page_icon="🍔",
+    layout="wide"
+)
+
+# ---------------------------
+# 2. CSS Animations & Styling
+# ---------------------------
+st.markdown(_CSS, unsafe_allow_html=True)
 
 st.title("Search Before Action: Google Trends & India’s Delivery Wars")
 st.markdown("### Swiggy 🟠 | Zomato 🔴 | Blinkit 🟢")
@@ -67,56 +170,178 @@ st.markdown("### Swiggy 🟠 | Zomato 🔴 | Blinkit 🟢")
 # ---------------------------
 # 3. Helper Functions
 # ---------------------------
-@st.cache_data(ttl=86400)
-def load_trends():
-    pytrends = TrendReq(hl="en-IN", tz=330)
-    kw_list = ["Swiggy", "Zomato", "Blinkit"]
-    pytrends.build_payload(kw_list, timeframe="today 5-y", geo="IN")
+@st.cache_resource
+def _pytrends():
+    return TrendReq(hl="en-IN", tz=330)
+
+@st.cache_resource
+def _pytrends_lock():
+    # build_payload() rewrites the shared client's widget tokens, so each
+    # "build payload + fetch" must run alone. Cached so every session and
+    # rerun sees the same lock (plain module globals are rebuilt per rerun).
+    return threading.Lock()
+
+def _fetch_trends(kw_list, timeframe, geo_code):
+    pytrends = _pytrends()
+    with _pytrends_lock():
+        pytrends.build_payload(kw_list, timeframe=timeframe, geo=geo_code)
+
+        # Both widgets are independent HTTPS round-trips once the payload is built.
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            data_future = pool.submit(pytrends.interest_over_time)
+            geo_future = pool.submit(
+                pytrends.interest_by_region, resolution="REGION", inc_low_vol=False, inc_geo_code=False
+            )
+            data, geo = data_future.result(), geo_future.result()
 
-    data = pytrends.interest_over_time()
     if "isPartial" in data.columns:
         data = data.drop(columns=["isPartial"])
     data = data.reset_index()
 
-    geo = pytrends.interest_by_region(resolution="REGION", inc_low_vol=False, inc_geo_code=False)
     geo = geo.reset_index()
     geo = geo.rename(columns={"geoName": "state"})
 
-    state_mapping = {
-        "NCT": "Delhi",
-        "Orissa": "Odisha",
-        "Uttaranchal": "Uttarakhand",
-        "Jammu & Kashmir": "Jammu and Kashmir",
-        "Andaman & Nicobar Islands": "Andaman & Nicobar",
-        "Dadra and Nagar Haveli": "Dadra & Nagar Haveli",
-        "Daman and Diu": "Daman & Diu",
-        "Arunanchal Pradesh": "Arunachal Pradesh"
-    }
-    geo["state"] = geo["state"].replace(state_mapping)
-    geo["state"] = geo["state"].str.title().str.strip()
+    lut = {raw: _STATE_MAPPING.get(raw, raw).title().strip() for raw in geo["state"].unique()}
+    geo["state"] = geo["state"].map(lut).astype("category")
+
+    # Trends indices are 0-100, so int16 is plenty and quarters the footprint.
+    data[kw_list] = data[kw_list].astype("int16")
+    geo[kw_list] = geo[kw_list].astype("int16")
 
     return data, geo
 
-# ---------------------------
-# 4. Load Data
-# ---------------------------
-try:
-    df, geo_df = load_trends()
-except Exception:
-    st.warning("⚠️ Could not fetch live Google Trends data. Using dummy data.")
+def _summarize(data, kw_list):
+    # Page-level reductions done once per data load instead of on every visit.
+    vals = data[kw_list].to_numpy(dtype=float)
+    return {
+        "peaks": dict(zip(kw_list, data[kw_list].to_numpy().max(axis=0).tolist())),
+        "corr": pd.DataFrame(np.corrcoef(vals, rowvar=False), index=kw_list, columns=kw_list)
+    }
+
+def _read_snapshot(*paths):
+    # Best effort: a missing, unreadable or corrupt snapshot just means a fresh fetch.
+    try:
+        return tuple(pd.read_parquet(path) for path in paths)
+    except (OSError, pa.ArrowException):
+        return None
+
+def _write_snapshot(frames, prefix, key):
+    # Best effort as well, e.g. a read-only app directory must not break loading.
+    try:
+        _CACHE_DIR.mkdir(exist_ok=True)
+        for path, frame in frames.items():
+            # Write aside and rename, so a killed write never leaves a corrupt file.
+            tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            try:
+                frame.to_parquet(tmp, compression="zstd", index=False)
+                os.replace(tmp, path)
+            finally:
+                tmp.unlink(missing_ok=True)
+        for stale in _CACHE_DIR.glob(f"trends_*_{key}_*.parquet"):
+            if not stale.name.startswith(prefix):
+                stale.unlink(missing_ok=True)
+    except (OSError, pa.ArrowException):
+        pass
+
+@st.cache_data(ttl=86400)
+def load_trends():
+    kw_list = ["Swiggy", "Zomato", "Blinkit"]
+    timeframe, geo_code = "today 5-y", "IN"
+
+    # Daily Parquet snapshot so fresh workers skip the pytrends round-trips.
+    key = hashlib.sha1(f"{kw_list}|{timeframe}|{geo_code}".encode()).hexdigest()[:12]
+    prefix = f"trends_{date.today():%Y%m%d}_{key}"
+    data_path = _CACHE_DIR / f"{prefix}_time.parquet"
+    geo_path = _CACHE_DIR / f"{prefix}_geo.parquet"
+
+    snapshot = _read_snapshot(data_path, geo_path)
+    if snapshot is not None:
+        data, geo = snapshot
+    else:
+        data, geo = _fetch_trends(kw_list, timeframe, geo_code)
+        _write_snapshot({data_path: data, geo_path: geo}, prefix, key)
+
+    return data, geo, _summarize(data, kw_list)
+
+@st.cache_data(ttl=86400)
+def load_related_queries():
+    pytrends = _pytrends()
+    kw_list = ["Swiggy", "Zomato", "Blinkit"]
+    with _pytrends_lock():
+        pytrends.build_payload(kw_list, timeframe="today 12-m", geo="IN")
+        related = pytrends.related_queries()
+    return {kw: related[kw]["top"] for kw in kw_list}
+
+@st.cache_data
+def _fallback_data():
+    kw_list = ["Swiggy", "Zomato", "Blinkit"]
     dates = pd.date_range("2019-01-01", periods=250, freq="W")
-    df = pd.DataFrame({
-        "date": dates,
-        "Swiggy": np.random.randint(30, 90, size=len(dates)),
-        "Zomato": np.random.randint(40, 95, size=len(dates)),
-        "Blinkit": np.random.randint(20, 100, size=len(dates))
-    })
+    vals = _RNG.integers([30, 40, 20], [90, 95, 100], size=(len(dates), 3), dtype=np.int16)
+    # One (n, 3) int16 buffer backs all three columns as a single block.
+    df = pd.DataFrame(vals, columns=kw_list)
+    df.insert(0, "date", dates)
     geo_df = pd.DataFrame({
         "state": ["Delhi", "Karnataka", "Maharashtra", "Tamil Nadu", "Uttar Pradesh"],
         "Swiggy": [70, 55, 60, 80, 50],
         "Zomato": [65, 70, 75, 60, 55],
         "Blinkit": [85, 40, 50, 30, 25]
-    })
+    }).astype({"state": "category", "Swiggy": "int16", "Zomato": "int16", "Blinkit": "int16"})
+    return df, geo_df, _summarize(df, kw_list)
+
+@st.cache_data(ttl=3600)
+def _safe_load_trends():
+    # Failures are cached too, so a dead endpoint isn't retried on every rerun.
+    try:
+        return load_trends(), True
+    except Exception:
+        return _fallback_data(), False
+
+@st.cache_data
+def _wc_png(text, width=800, height=400, background_color="white"):
+    # Imported lazily: only the Search Intent page needs it.
+    from wordcloud import STOPWORDS, WordCloud
+
+    # Count words directly instead of WordCloud's regex tokenizer, keeping its
+    # stopword filter and the original casing of brand names.
+    freq = Counter(w for w in text.split() if w.lower() not in STOPWORDS)
+    wc = WordCloud(width=width, height=height, background_color=background_color)
+    buf = io.BytesIO()
+    wc.generate_from_frequencies(freq).to_image().save(buf, format="PNG")
+    return buf.getvalue()
+
+@st.cache_data
+def _smooth(df, window, cols=("Swiggy", "Zomato", "Blinkit")):
+    cols = list(cols)
+    smoothed = bn.move_mean(df[cols].to_numpy(dtype=np.float32), window=window, axis=0)
+    return pd.DataFrame(
+        {"date": df["date"].to_numpy(), **{c: smoothed[:, i] for i, c in enumerate(cols)}},
+        index=df.index
+    )
+
+def _line_figure(frame, title, x_title="date", y_title="value"):
+    # Wide-format traces straight from NumPy, skipping Plotly Express's melt.
+    x = frame["date"].to_numpy()
+    fig = go.Figure()
+    for app, color in _APP_COLORS.items():
+        fig.add_trace(go.Scattergl(x=x, y=frame[app].to_numpy(), mode="lines", name=app, line_color=color))
+    fig.update_layout(title=title, xaxis_title=x_title, yaxis_title=y_title, legend_title_text="variable")
+    return fig
+
+@st.cache_data
+def _top_states(geo_df, n=15):
+    # Only three possible app choices, so rank once per data load.
+    return {app: geo_df.nlargest(n, app) for app in ["Swiggy", "Zomato", "Blinkit"]}
+
+@st.cache_data
+def _styled_html(df, col, cmap):
+    return df.style.background_gradient(subset=[col], cmap=cmap).hide(axis="index").to_html()
+
+# ---------------------------
+# 4. Load Data
+# ---------------------------
+(df, geo_df, summary), live = _safe_load_trends()
+if not live:
+    st.warning("⚠️ Could not fetch live Google Trends data. Using dummy data.")
 
 # ---------------------------
 # 5. Sidebar Navigation
@@ -139,21 +364,23 @@ page = st.sidebar.radio(
 # ---------------------------
 
 # --- Overview Page ---
-if page == "Overview":
+def _page_overview(df, geo_df, summary):
     st.subheader("📌 Big Picture: Who’s Winning?")
     col1, col2, col3 = st.columns(3)
-    col1.metric("Swiggy Peak", f"{df['Swiggy'].max()} index")
-    col2.metric("Zomato Peak", f"{df['Zomato'].max()} index")
-    col3.metric("Blinkit Peak", f"{df['Blinkit'].max()} index")
+    peaks = summary["peaks"]
+    col1.metric("Swiggy Peak", f"{peaks['Swiggy']} index")
+    col2.metric("Zomato Peak", f"{peaks['Zomato']} index")
+    col3.metric("Blinkit Peak", f"{peaks['Blinkit']} index")
 
-    fig = px.line(
+    fig = _line_figure(
         df,
-        x="date",
-        y=["Swiggy","Zomato","Blinkit"],
-        title="📈 Search Popularity Over Time (5 years)",
-        labels={"value":"Search Index", "date":"Date"}
+        "📈 Search Popularity Over Time (5 years)",
+        x_title="Date",
+        y_title="Search Index"
     )
-    st.plotly_chart(fig, use_container_width=True)
+    # Big-picture view: skip hover hit-testing and the mode bar.
+    fig.update_layout(hovermode=False)
+    st.plotly_chart(fig, use_container_width=True, config={"displayModeBar": False})
 
     st.markdown("**💡 Key Insights:**")
     st.markdown("🟢 Blinkit shows rapid growth post-2022 → rise of quick-commerce.")
@@ -162,17 +389,15 @@ if page == "Overview":
     st.markdown("⚡ Peaks in search often align with promotions, festivals, or news.")
 
 # --- Trends Over Time ---
-elif page == "Trends Over Time":
+@st.fragment
+def _page_trends(df, geo_df, summary):
     st.subheader("📈 Interactive Time-Series")
     window = st.slider("Smoothing Window (weeks):", 1, 8, 4)
-    df_smooth = df.copy()
-    df_smooth[["Swiggy","Zomato","Blinkit"]] = df_smooth[["Swiggy","Zomato","Blinkit"]].rolling(window).mean()
+    df_smooth = _smooth(df, window)
 
-    fig = px.line(
+    fig = _line_figure(
         df_smooth,
-        x="date",
-        y=["Swiggy","Zomato","Blinkit"],
-        title="Search Trends (Smoothed)"
+        "Search Trends (Smoothed)"
     )
     st.plotly_chart(fig, use_container_width=True)
 
@@ -182,18 +407,19 @@ elif page == "Trends Over Time":
     st.markdown("🟠 Swiggy/Zomato trends reveal long-term engagement patterns.")
 
 # --- Regional Insights ---
-elif page == "Regional Insights":
+@st.fragment
+def _page_regional(df, geo_df, summary):
     st.subheader("📊 Regional Popularity Across States")
     app_choice = st.selectbox("Choose App to Visualize:", ["Swiggy","Zomato","Blinkit"])
 
-    geo_sorted = geo_df.sort_values(by=app_choice, ascending=False)
+    geo_top = _top_states(geo_df)[app_choice]
     fig = px.bar(
-        geo_sorted,
+        geo_top,
         x=app_choice,
         y="state",
         orientation="h",
         text=app_choice,
-        title=f"{app_choice} Popularity Across States",
+        title=f"{app_choice} Popularity Across States (Top 15)",
         labels={app_choice:"Search Index", "state":"State"},
         color=app_choice,
         color_continuous_scale="YlOrRd"
@@ -202,9 +428,7 @@ elif page == "Regional Insights":
     st.plotly_chart(fig, use_container_width=True)
 
     st.subheader(f"🌡️ Color-coded Table: {app_choice}")
-    st.dataframe(
-        geo_df.style.background_gradient(subset=[app_choice], cmap="YlOrRd")
-    )
+    st.markdown(_styled_html(geo_df, app_choice, "YlOrRd"), unsafe_allow_html=True)
 
     st.markdown("**💡 Insights:**")
     st.markdown("🏙️ Delhi shows high Blinkit interest → urban adoption.")
@@ -213,14 +437,12 @@ elif page == "Regional Insights":
     st.markdown("📈 Regional strategies can be optimized using this data.")
 
 # --- Search Intent ---
-elif page == "Search Intent":
+@st.fragment
+def _page_search_intent(df, geo_df, summary):
     st.subheader("🔍 What Are People Searching?")
-    pytrends = TrendReq(hl="en-IN", tz=330)
     app_choice = st.selectbox("Choose App:", ["Swiggy","Zomato","Blinkit"])
     try:
-        pytrends.build_payload([app_choice], timeframe="today 12-m", geo="IN")
-        related = pytrends.related_queries()
-        top_queries = related[app_choice]["top"].head(10)
+        top_queries = load_related_queries()[app_choice].head(10)
         st.write("Top Queries:")
         st.dataframe(top_queries)
         text = " ".join(top_queries["query"].dropna().tolist())
@@ -229,11 +451,7 @@ elif page == "Search Intent":
         placeholder_queries = ["Swiggy coupon","Swiggy near me","Zomato pizza","Blinkit near me"]
         text = " ".join(placeholder_queries)
 
-    wc = WordCloud(width=800, height=400, background_color="white").generate(text)
-    fig, ax = plt.subplots(figsize=(10,5))
-    ax.imshow(wc, interpolation="bilinear")
-    ax.axis("off")
-    st.pyplot(fig)
+    st.image(_wc_png(text), width="stretch")
 
     st.markdown("**💡 Insights:**")
     st.markdown("🔍 Reveals real user intent: coupons, nearby services, popular items.")
@@ -241,9 +459,9 @@ elif page == "Search Intent":
     st.markdown("🟠 Swiggy/Zomato → menu preferences & discounts.")
 
 # --- Stats & Correlations ---
-elif page == "Stats & Correlations":
+def _page_stats(df, geo_df, summary):
     st.subheader("📊 Stats & Correlations")
-    corr = df[["Swiggy","Zomato","Blinkit"]].corr()
+    corr = summary["corr"]
     st.dataframe(corr)
 
     st.markdown("**💡 Insights:**")
@@ -252,12 +470,10 @@ elif page == "Stats & Correlations":
     st.markdown("🔮 Useful for forecasting growth and overlap in user interest.")
 
     st.markdown("**Key Formulas:**")
-    st.latex(r"Z = \frac{x - \mu}{\sigma}")
-    st.latex(r"\text{Correlation}(X,Y) = \frac{\text{cov}(X,Y)}{\sigma_X \sigma_Y}")
-    st.latex(r"\text{Lag Correlation} = \text{Corr}(X_t, Y_{t+k})")
+    st.markdown(_FORMULAS_MD)
 
 # --- Challenges & Story ---
-elif page == "Challenges & Story":
+def _page_story(df, geo_df, summary):
     st.subheader("⚡ Challenges & Eureka Moments")
     st.markdown("**Challenges:**")
     st.markdown("- Relative Scaling → anchored to 'food delivery'")
@@ -270,66 +486,20 @@ elif page == "Challenges & Story":
     st.markdown("🌍 Regional differences uncover hidden growth pockets.")
     st.markdown("📊 Trend analysis guides marketing campaigns & inventory planning.")
 
+# Widget pages are fragments, so a slider/selectbox change reruns only that page.
+_PAGES = {
+    "Overview": _page_overview,
+    "Trends Over Time": _page_trends,
+    "Regional Insights": _page_regional,
+    "Search Intent": _page_search_intent,
+    "Stats & Correlations": _page_stats,
+    "Challenges & Story": _page_story
+}
+_PAGES[page](df, geo_df, summary)
+
 # Sidebar Footer
 st.sidebar.markdown("---")
 st.sidebar.markdown("Made with ❤️ using Streamlit, PyTrends, Plotly & WordCloud")
 
 # --------------------------- Fancy Footer ---------------------------
-footer_html = """
-<style>
-.footer-card {
-    background-color: #F8F9FA;
-    padding: 20px;
-    border-radius: 12px;
-    margin-top: 30px;
-    text-align: center;
-    border: 1px solid #E0E0E0;
-    font-family: 'Arial', sans-serif;
-    transition: transform 0.3s ease, box-shadow 0.3s ease;
-}
-.footer-card:hover {
-    transform: scale(1.05);
-    box-shadow: 0 8px 20px rgba(0,0,0,0.15);
-}
-.footer-table {
-    margin: auto;
-    color: #34495E;
-    font-size: 14px;
-    border-collapse: collapse;
-}
-.footer-table th, .footer-table td {
-    padding: 5px 15px;
-    border-bottom: 1px solid #BDC3C7;
-}
-.footer-title {
-    margin: 5px;
-    color: #2E86C1;
-    font-weight: bold;
-}
-.footer-team {
-    color: #D35400;
-}
-.footer-copy {
-    margin-top: 10px;
-    font-size: 12px;
-    color: #7F8C8D;
-}
-</style>
-
-<div class="footer-card">
-    <h3 class="footer-title">Developed by: <span class="footer-team">STANDARD DEVIANTS</span></h3>
-    <table class="footer-table">
-        <tr>
-            <th>Team Member</th>
-            <th>Roll Number</th>
-        </tr>
-        <tr><td>NIRANJAN PRAMOD</td><td>252BDA09</td></tr>
-        <tr><td>MENDONCA TANISHA DENIS</td><td>252BDA10</td></tr>
-        <tr><td>TANISHQ SULTANIA</td><td>252BDA12</td></tr>
-        <tr><td>R VINAY KUMAR</td><td>252BDA14</td></tr>
-        <tr><td>RAKSHITH C</td><td>252BDA31</td></tr>
-    </table>
-    <p class="footer-copy">&copy; 2025 Search Before Action: Delivery Wars</p>
-</div>
-"""
-st.markdown(footer_html, unsafe_allow_html=True)
+st.markdown(_FOOTER_HTML, unsafe_allow_html=True)